@@ -1,189 +1,300 @@
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-from typing import List
-from sqlalchemy import (create_engine,
-                        Column,
-                        Integer,
-                        String,
-                        ForeignKey,
-                        UniqueConstraint,
-                        select,
-                        Boolean,)
-from sqlalchemy.orm import declarative_base, Session
-
-# Database setup
-DATABASE_URL = "sqlite:///./school.db"
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
-Base = declarative_base()
-
-# Table definitions
-
-
-class Student(Base):
-    __tablename__ = "students"
-    id = Column(Integer, primary_key=True, index=True)
-    name = Column(String, nullable=False)
-
-
-class Course(Base):
-    __tablename__ = "courses"
-    id = Column(Integer, primary_key=True, index=True)
-    title = Column(String, nullable=False)
-    description = Column(String, default="")
-    credits = Column(Integer, default=3)
-
-
-class Enrollment(Base):
-    __tablename__ = "enrollments"
-    id = Column(Integer, primary_key=True)
-    student_id = Column(Integer, ForeignKey("students.id"), nullable=False)
-    course_id = Column(Integer, ForeignKey("courses.id"), nullable=False)
-
-    __table_args__ = (
-        UniqueConstraint("student_id", "course_id", name="uq_student_course"),
-    )
-
-
-Base.metadata.create_all(bind=engine)
-# Pydantic schemas
-
-
-class StudentCreate(BaseModel):
-    name: str
-
-
-class StudentOut(BaseModel):
-    id: int
-    name: str
-
-
-class CourseCreate(BaseModel):
-    title: str
-
-
-class CourseOut(BaseModel):
-    id: int
-    title: str
-
-
-class EnrollRequest(BaseModel):
-    student_id: int
-    course_id: int
-
-
-class StudentWithCourses(BaseModel):
-    id: int
-    name: str
-    courses: List[CourseOut]
-
-
-# FastAPI app
-app = FastAPI()
-
-
-@app.get("/")
-def read_root():
-    return {"message": "Welcome to the School Management System API"}
-# ---- Students CRUD ----
-
-
-@app.post("/students", response_model=StudentOut)
-def create_student(payload: StudentCreate):
-    with Session(engine) as session:
-        student = Student(name=payload.name)
-        session.add(student)
-        session.commit()
-        session.refresh(student)
-        return student
-
-
-@app.get("/students", response_model=List[StudentOut])
-def list_students():
-    with Session(engine) as session:
-        students = session.scalars(select(Student)).all()
-        return students
-
-
-@app.get("/students/{student_id}", response_model=StudentOut)
-def get_student(student_id: int):
-    with Session(engine) as session:
-        student = session.get(Student, student_id)
-        if not student:
-            raise HTTPException(status_code=404, detail="Student not found")
-        return student
-
-
-@app.delete("/students/{student_id}")
-def delete_student(student_id: int):
-    with Session(engine) as session:
-        student = session.get(Student, student_id)
-        if not student:
-            raise HTTPException(status_code=404, detail="Student not found")
-        session.delete(student)
-        session.commit()
-        return {"deleted": student_id}
-
-# ---- Courses CRUD (simple) ----
-
-
-@app.post("/courses", response_model=CourseOut)
-def create_course(payload: CourseCreate):
-    with Session(engine) as session:
-        course = Course(title=payload.title)
-        session.add(course)
-        session.commit()
-        session.refresh(course)
-        return course
-
-
-@app.get("/courses", response_model=List[CourseOut])
-def list_courses():
-    with Session(engine) as session:
-        courses = session.scalars(select(Course)).all()
-        return courses
-# ---- Enrollments ----
-
-
-@app.post("/enroll")
-def enroll(req: EnrollRequest):
-    with Session(engine) as session:
-        student = session.get(Student, req.student_id)
-        if not student:
-            raise HTTPException(status_code=404, detail="Student not found")
-
-        course = session.get(Course, req.course_id)
-        if not course:
-            raise HTTPException(status_code=404, detail="Course not found")
-
-        enrollment = Enrollment(
-            student_id=req.student_id, course_id=req.course_id)
-        session.add(enrollment)
-        try:
-            session.commit()
-        except Exception:
-            session.rollback()
-            raise HTTPException(
-                status_code=400, detail="Already enrolled (or invalid)")
-
-        return {"enrolled": True, "student_id": req.student_id, "course_id": req.course_id}
-
-
-@app.get("/students/{student_id}/courses", response_model=StudentWithCourses)
-def get_student_courses(student_id: int):
-    with Session(engine) as session:
-        student = session.get(Student, student_id)
-        if not student:
-            raise HTTPException(status_code=404, detail="Student not found")
-
-        stmt = (
-            select(Course)
-            .join(Enrollment, Enrollment.course_id == Course.id)
-            .where(Enrollment.student_id == student_id)
-        )
-        courses = session.scalars(stmt).all()
-
-        return StudentWithCourses(
-            id=student.id,
-            name=student.name,
-            courses=[CourseOut(id=c.id, title=c.title) for c in courses]
-        )
+from fastapi import FastAPI, HTTPException, Depends, Request, Response
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from pydantic import BaseModel, ConfigDict, TypeAdapter
+from typing import List, Optional
+from sqlalchemy import (Column,
+                        Integer,
+                        String,
+                        ForeignKey,
+                        UniqueConstraint,
+                        Index,
+                        select,
+                        insert,
+                        delete,
+                        func,
+                        Boolean,)
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import relationship, selectinload, Session
+
+from db import engine, Base, get_db
+
+# Table definitions
+
+
+class Student(Base):
+    __tablename__ = "students"
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, nullable=False)
+
+    # lazy="raise" so accidental lazy access raises instead of silently
+    # issuing a per-row SELECT; eager-load explicitly where needed.
+    courses = relationship("Course", secondary="enrollments", lazy="raise")
+    enrollments = relationship("Enrollment", lazy="raise", viewonly=True)
+
+
+class Course(Base):
+    __tablename__ = "courses"
+    id = Column(Integer, primary_key=True, index=True)
+    title = Column(String, nullable=False)
+    description = Column(String, default="")
+    credits = Column(Integer, default=3)
+
+
+class Enrollment(Base):
+    __tablename__ = "enrollments"
+    id = Column(Integer, primary_key=True)
+    student_id = Column(Integer, ForeignKey("students.id"), nullable=False)
+    course_id = Column(Integer, ForeignKey("courses.id"), nullable=False)
+
+    course = relationship("Course", lazy="raise", viewonly=True)
+
+    __table_args__ = (
+        UniqueConstraint("student_id", "course_id", name="uq_student_course"),
+        # Covering indexes for both join directions: student -> courses
+        # and course -> students resolve with index-only scans.
+        Index("ix_enroll_student_course", "student_id", "course_id"),
+        Index("ix_enroll_course_student", "course_id", "student_id"),
+    )
+
+
+Base.metadata.create_all(bind=engine)
+# Pydantic schemas
+
+
+class StudentCreate(BaseModel):
+    name: str
+
+
+class StudentOut(BaseModel):
+    id: int
+    name: str
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class CourseCreate(BaseModel):
+    title: str
+
+
+class CourseOut(BaseModel):
+    id: int
+    title: str
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class EnrollRequest(BaseModel):
+    student_id: int
+    course_id: int
+
+
+class StudentWithCourses(BaseModel):
+    id: int
+    name: str
+    courses: List[CourseOut]
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+# How many rows each streamed partition materializes at once.
+STREAM_BATCH_SIZE = 1000
+
+# Built once; validate/dump whole partitions through pydantic-core's
+# Rust bulk path instead of encoding row by row in Python.
+_students_adapter = TypeAdapter(List[StudentOut])
+_courses_adapter = TypeAdapter(List[CourseOut])
+
+
+def _table_etag(session, model):
+    # Sub-ms index-only version token: any insert or delete changes
+    # either the row count or the max id.
+    count, max_id = session.execute(
+        select(func.count(), func.max(model.id)).select_from(model)
+    ).one()
+    return '"{}-{}-{}"'.format(model.__tablename__, count, max_id)
+
+
+def _stream_json_array(result, adapter):
+    """Stream a JSON array one yield_per partition at a time.
+
+    Peak memory stays O(STREAM_BATCH_SIZE) and the client starts
+    receiving bytes after the first partition, not the last row.
+    """
+    yield b"["
+    first = True
+    for partition in result.partitions():
+        rows = adapter.validate_python(list(partition), from_attributes=True)
+        chunk = adapter.dump_json(rows)
+        if len(chunk) > 2:  # skip empty partitions: chunk == b"[]"
+            if not first:
+                yield b","
+            first = False
+            yield chunk[1:-1]
+    yield b"]"
+
+
+# FastAPI app
+app = FastAPI(default_response_class=ORJSONResponse)
+
+
+@app.get("/")
+def read_root():
+    return {"message": "Welcome to the School Management System API"}
+# ---- Students CRUD ----
+
+
+@app.post("/students", response_model=StudentOut)
+def create_student(payload: StudentCreate, session: Session = Depends(get_db)):
+    student = Student(name=payload.name)
+    session.add(student)
+    session.commit()
+    session.refresh(student)
+    return student
+
+
+@app.post("/students/bulk")
+def create_students_bulk(payloads: List[StudentCreate],
+                         session: Session = Depends(get_db)):
+    # One compiled INSERT driven through DB-API executemany in a single
+    # transaction: one WAL append instead of a commit per row.
+    if payloads:
+        session.execute(insert(Student), [p.model_dump() for p in payloads])
+        session.commit()
+    return {"created": len(payloads)}
+
+
+@app.get("/students")
+def list_students(request: Request,
+                  limit: Optional[int] = None, offset: int = 0,
+                  session: Session = Depends(get_db)):
+    etag = _table_etag(session, Student)
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304)
+
+    # Core column projection: no identity map, no per-row ORM __init__,
+    # just lightweight RowMappings straight into pydantic-core.
+    stmt = (select(Student.id, Student.name)
+            .execution_options(yield_per=STREAM_BATCH_SIZE)
+            .offset(offset))
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    result = session.execute(stmt).mappings()
+    return StreamingResponse(
+        _stream_json_array(result, _students_adapter),
+        media_type="application/json",
+        headers={"ETag": etag},
+    )
+
+
+@app.get("/students_with_courses", response_model=List[StudentWithCourses])
+def list_students_with_courses(session: Session = Depends(get_db)):
+    # Two queries total regardless of student count: one for students,
+    # one IN (...) batch for their enrollments/courses.
+    stmt = select(Student).options(
+        selectinload(Student.enrollments).selectinload(Enrollment.course)
+    )
+    students = session.scalars(stmt).all()
+    # Hand raw rows to FastAPI; pydantic-core converts the whole batch
+    # via from_attributes instead of a per-field Python loop.
+    return [
+        {"id": s.id, "name": s.name,
+         "courses": [e.course for e in s.enrollments]}
+        for s in students
+    ]
+
+
+@app.get("/students/{student_id}", response_model=StudentOut)
+def get_student(student_id: int, session: Session = Depends(get_db)):
+    student = session.get(Student, student_id)
+    if not student:
+        raise HTTPException(status_code=404, detail="Student not found")
+    return student
+
+
+@app.delete("/students/{student_id}")
+def delete_student(student_id: int, session: Session = Depends(get_db)):
+    # Single DELETE; rowcount tells us whether the student existed,
+    # so no need to hydrate the row first.
+    result = session.execute(delete(Student).where(Student.id == student_id))
+    session.commit()
+    if result.rowcount == 0:
+        raise HTTPException(status_code=404, detail="Student not found")
+    return {"deleted": student_id}
+
+# ---- Courses CRUD (simple) ----
+
+
+@app.post("/courses", response_model=CourseOut)
+def create_course(payload: CourseCreate, session: Session = Depends(get_db)):
+    course = Course(title=payload.title)
+    session.add(course)
+    session.commit()
+    session.refresh(course)
+    return course
+
+
+@app.get("/courses")
+def list_courses(request: Request,
+                 limit: Optional[int] = None, offset: int = 0,
+                 session: Session = Depends(get_db)):
+    etag = _table_etag(session, Course)
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304)
+
+    stmt = (select(Course.id, Course.title)
+            .execution_options(yield_per=STREAM_BATCH_SIZE)
+            .offset(offset))
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    result = session.execute(stmt).mappings()
+    return StreamingResponse(
+        _stream_json_array(result, _courses_adapter),
+        media_type="application/json",
+        headers={"ETag": etag},
+    )
+# ---- Enrollments ----
+
+
+@app.post("/enroll")
+def enroll(req: EnrollRequest, session: Session = Depends(get_db)):
+    # Projected existence probes: SELECT 1, no ORM hydration.
+    if not session.scalar(select(1).where(Student.id == req.student_id)):
+        raise HTTPException(status_code=404, detail="Student not found")
+
+    if not session.scalar(select(1).where(Course.id == req.course_id)):
+        raise HTTPException(status_code=404, detail="Course not found")
+
+    # Duplicate enrollments resolve inside SQLite; no exception unwind,
+    # no rollback, no WAL traffic for the failed transaction.
+    stmt = (
+        sqlite_insert(Enrollment)
+        .values(student_id=req.student_id, course_id=req.course_id)
+        .on_conflict_do_nothing(index_elements=["student_id", "course_id"])
+        .returning(Enrollment.id)
+    )
+    inserted = session.scalar(stmt)
+    session.commit()
+
+    if inserted is None:
+        raise HTTPException(status_code=400, detail="Already enrolled")
+
+    return {"enrolled": True, "student_id": req.student_id, "course_id": req.course_id}
+
+
+@app.get("/students/{student_id}/courses", response_model=StudentWithCourses)
+def get_student_courses(student_id: int, session: Session = Depends(get_db)):
+    # Read-only path: Core projections skip ORM hydration entirely and
+    # the RowMappings feed pydantic-core's dict fast path.
+    student = session.execute(
+        select(Student.id, Student.name).where(Student.id == student_id)
+    ).mappings().one_or_none()
+    if not student:
+        raise HTTPException(status_code=404, detail="Student not found")
+
+    courses = session.execute(
+        select(Course.id, Course.title)
+        .join(Enrollment, Enrollment.course_id == Course.id)
+        .where(Enrollment.student_id == student_id)
+    ).mappings().all()
+
+    return {"id": student["id"], "name": student["name"], "courses": courses}